@@ -5,15 +5,46 @@
 功能：查询论文被哪些文献引用，获取引用文献的DOI、标题和作者信息
 """
 
+import codecs
 import csv
+import hashlib
+import json
 import sys
 import os
 import re
+import shutil
+import sqlite3
 import time
+import threading
+import unicodedata
 import requests
-from collections import OrderedDict
-from datetime import datetime
-from urllib.parse import unquote  # 用于处理URL编码的DOI
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import unquote, urlparse  # 用于处理URL编码的DOI
+
+try:
+    # requests 2.26+ 自带 charset-normalizer；旧版本环境中可能没有
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
+
+try:
+    # 可选依赖：pip install requests-cache，用于在本地缓存API响应
+    from requests_cache import CachedSession, DO_NOT_CACHE
+except ImportError:
+    CachedSession = None
+
+try:
+    # 可选依赖：pip install orjson，解析大块JSON响应（如OpenAlex分页）更快
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
 
 # API配置
 OPENALEX_BASE_URL = "https://api.openalex.org"
@@ -24,14 +55,105 @@ CROSSREF_DEPOSITORREPORT_URL = "https://data.crossref.org/depositorreport"
 # 请求配置
 REQUEST_TIMEOUT = 30
 RETRY_COUNT = 3
-DELAY_BETWEEN_REQUESTS = 0.5  # 秒
+
+# 本地缓存配置
+CACHE_EXPIRE_AFTER = timedelta(days=30)
+# Crossref 元数据按DOI缓存（内置，无需额外依赖）；查不到的DOI也会记录，避免重复查询
+CROSSREF_CACHE_FILE = "crossref_metadata_cache.sqlite"
+# OpenCitations 的响应缓存（需要安装 requests-cache）；404 也会缓存
+CACHE_NAME = "citation_cache"  # 生成 citation_cache.sqlite
+CACHE_URLS = ("opencitations.net",)
+
+# 检测CSV编码时读取的样本大小
+ENCODING_SAMPLE_SIZE = 65536  # 字节
+
+# 并发配置
+DOI_WORKERS = 4        # 同时处理的DOI数量
+CROSSREF_WORKERS = 8   # 每个DOI补全元数据时的并发数
+CROSSREF_BATCH_SIZE = 50  # 每次向Crossref批量查询的DOI数量
+OPENALEX_PAGE_WORKERS = 4  # 同时预取的OpenAlex引用列表页数
+# 每个主机允许同时进行的请求数（用于遵守各API的频率限制）
+HOST_CONCURRENCY = {
+    "api.openalex.org": 4,
+    "opencitations.net": 2,
+    "api.crossref.org": 8,
+}
+DEFAULT_HOST_CONCURRENCY = 4
+# 每个主机每秒允许的请求数（令牌桶限速，与并发数相互独立）
+# Crossref 会在响应头中返回实际限额，届时以响应头为准
+HOST_RATE_LIMITS = {
+    "api.openalex.org": 10,
+    "opencitations.net": 5,
+    "api.crossref.org": 45,
+}
+
+# 联系邮箱：请改为真实邮箱，OpenAlex/Crossref 会将带真实邮箱的请求
+# 分配到响应更快、频率限制更宽松的 "polite pool"
+CONTACT_EMAIL = "your-email@example.com"
 
 # 请求头
 HEADERS = {
-    "User-Agent": "CitationFinder/1.1 (mailto:your-email@example.com)",
+    "User-Agent": f"CitationFinder/1.1 (mailto:{CONTACT_EMAIL})",
     "Accept": "application/json"
 }
 
+# 全局共享的会话：复用TCP/TLS连接，避免每次请求重新握手
+if CachedSession is not None:
+    SESSION = CachedSession(
+        CACHE_NAME,
+        expire_after=DO_NOT_CACHE,
+        urls_expire_after={url: CACHE_EXPIRE_AFTER for url in CACHE_URLS},
+        allowable_codes=(200, 404),
+    )
+else:
+    SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=0)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# DOI格式校验 (宽松匹配，允许 10.xxxx/...) 与 Crossref PubID 格式
+_DOI_RE = re.compile(r'^10\.\d{4,}/.+$', re.IGNORECASE)
+_PUBID_RE = re.compile(r'[Jj]\d+')
+
+# 常见的DOI前缀 (https://doi.org/、http://dx.doi.org/、doi: 等，忽略大小写)
+_DOI_PREFIX_RE = re.compile(r'^(?:https?://)?(?:dx\.)?doi\.org/|^doi:', re.IGNORECASE)
+
+# 频率限制响应头中的时间间隔，如 "1s"、"60s"、"1m"
+_INTERVAL_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*([smh]?)$', re.IGNORECASE)
+_INTERVAL_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600}
+
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+# 各主机的令牌桶：{host: {'rate': 每秒请求数, 'tokens': 当前令牌数, 'updated': 上次更新时间}}
+# 请求的节流全部由令牌桶负责，与 HOST_CONCURRENCY 的并发限制互不影响
+_host_rate_limits = {}
+_host_rate_limits_lock = threading.Lock()
+
+# Crossref 元数据缓存库的连接（多线程共用，按需打开；打开失败时为 False，不再使用缓存）
+_crossref_cache = None
+_crossref_cache_lock = threading.Lock()
+
+# 控制台输出：多个线程的进度合并成 stderr 上的一行，所有输出都经过同一把锁，
+# 打印普通信息前先擦掉进度行，打印完再重画，避免两者混在同一行
+_console_lock = threading.Lock()
+_progress_lines = {}  # {desc: 当前进度文本}
+_progress_width = 0   # 进度行当前在终端上占用的宽度
+
+# 用户按 Ctrl-C 后由 main 设置，通知所有工作线程尽快停止发出新请求
+_stop_event = threading.Event()
+
+
+class RequestFailedError(Exception):
+    """请求多次重试后仍然失败（与 404 "查无此记录" 区分开）"""
+
+
+def check_stopped():
+    """查询已被用户中断时抛出 RequestFailedError，让工作线程尽快退出"""
+    if _stop_event.is_set():
+        raise RequestFailedError("查询已中断")
+
 
 def print_banner():
     """打印程序横幅"""
@@ -44,6 +166,57 @@ def print_banner():
     print()
 
 
+def display_width(text):
+    """计算文本在终端上的显示宽度（中文等全角字符占两格）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+
+def _clear_progress_line():
+    """擦掉 stderr 上的进度行（调用方需持有 _console_lock）"""
+    global _progress_width
+    if _progress_width:
+        sys.stderr.write("\r" + " " * _progress_width + "\r")
+        _progress_width = 0
+
+
+def _draw_progress_line():
+    """把所有进行中的进度合并为一行画在 stderr 上，超出终端宽度的部分截掉（调用方需持有 _console_lock）"""
+    global _progress_width
+    if _progress_lines:
+        line = " | ".join(_progress_lines.values())
+        max_width = shutil.get_terminal_size().columns - 1
+        if display_width(line) > max_width:
+            while line and display_width(line) > max_width - 3:
+                line = line[:-1]
+            line += "..."
+        sys.stderr.write(line)
+        _progress_width = display_width(line)
+    sys.stderr.flush()
+
+
+def print_progress(desc, current, total):
+    """刷新进度：各线程的进度合并显示在 stderr 的同一行，某项完成时单独输出一行"""
+    text = f"{desc}: {current}/{total}"
+    with _console_lock:
+        _clear_progress_line()
+        if current >= total:
+            _progress_lines.pop(desc, None)
+            sys.stderr.write(text + "\n")
+        else:
+            _progress_lines[desc] = text.strip()
+        _draw_progress_line()
+
+
+def log(*args, **kwargs):
+    """线程安全的 print：先擦掉进度行，输出后再重画，多线程中一律用它代替 print"""
+    with _console_lock:
+        _clear_progress_line()
+        sys.stderr.flush()
+        print(*args, **kwargs)
+        sys.stdout.flush()
+        _draw_progress_line()
+
+
 def normalize_doi(doi):
     """
     标准化DOI格式 (核心修复函数)
@@ -55,87 +228,88 @@ def normalize_doi(doi):
     if not doi:
         return None
     
+    # 快速路径：OpenAlex 返回的DOI已经是 https://doi.org/10.xxxx/... 的干净格式，
+    # 无需URL解码和去前缀，只做格式校验
+    if (isinstance(doi, str) and doi.startswith('https://doi.org/10.')
+            and '%' not in doi and not doi[-1].isspace()):
+        doi = doi[16:]
+        return doi.lower() if _DOI_RE.match(doi) else None
+    
     # 1. 转换为字符串并解码 (处理 URL encoded 字符)
     doi = unquote(str(doi)).strip()
     
-    # 2. 移除常见前缀 (忽略大小写)
-    doi_lower = doi.lower()
-    prefixes = [
-        "https://doi.org/",
-        "http://doi.org/",
-        "https://dx.doi.org/",
-        "http://dx.doi.org/",
-        "doi:",
-    ]
-    
-    for prefix in prefixes:
-        if doi_lower.startswith(prefix):
-            doi = doi[len(prefix):] # 移除前缀，保留原字符串的大小写用于后续处理
-            break
-    
-    # 3. 再次去除可能存在的空格
-    doi = doi.strip()
+    # 2. 移除常见前缀 (忽略大小写)，3. 再次去除可能存在的空格
+    doi = _DOI_PREFIX_RE.sub('', doi, count=1).strip()
     
     # 4. 验证DOI格式 (宽松匹配，允许 10.xxxx/...)
     # 最终返回小写版本，确保全局唯一性
-    if re.match(r'^10\.\d{4,}/.+$', doi, re.IGNORECASE):
+    if _DOI_RE.match(doi):
         return doi.lower()
     
     return None
 
 
+def detect_file_encoding(file_path):
+    """根据文件开头的样本检测文本编码，无法判断时返回 utf-8"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(ENCODING_SAMPLE_SIZE)
+    
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    
+    def can_decode(encoding):
+        # 使用增量解码器，避免样本末尾被截断的多字节字符导致误判
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return True
+        except UnicodeDecodeError:
+            return False
+    
+    # 优先尝试最常见的编码，都不匹配时再交给 charset-normalizer 判断
+    for encoding in ('utf-8', 'gbk'):
+        if can_decode(encoding):
+            return encoding
+    
+    if charset_normalizer is not None:
+        match = charset_normalizer.from_bytes(sample).best()
+        if match is not None:
+            return match.encoding
+    
+    return 'utf-8'
+
+
 def read_dois_from_csv(file_path):
-    """从CSV文件读取DOI列表"""
+    """从CSV文件读取DOI列表（只读取一遍文件）"""
     dois = []
     
     try:
-        # 尝试不同的编码
-        encodings = ['utf-8', 'utf-8-sig', 'gbk', 'gb2312', 'latin-1']
+        encoding = detect_file_encoding(file_path)
         
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    # 读取第一行检测编码是否正确
-                    first_line = f.readline()
-                    f.seek(0)
-                    
-                    reader = csv.DictReader(f)
-                    headers = reader.fieldnames
-                    
-                    if not headers:
-                        continue
-                    
-                    # 查找DOI列
-                    doi_column = None
-                    for header in headers:
-                        if header and 'doi' in header.lower():
-                            doi_column = header
-                            break
-                    
-                    if not doi_column:
-                        # 如果没有找到DOI列名，尝试在所有列中查找DOI格式的数据
-                        f.seek(0)
-                        reader = csv.reader(f)
-                        next(reader)  # 跳过标题行
-                        
-                        for row in reader:
-                            for cell in row:
-                                doi = normalize_doi(cell)
-                                if doi:
-                                    dois.append(doi)
-                    else:
-                        for row in reader:
-                            doi = normalize_doi(row.get(doi_column, ''))
+        with open(file_path, 'r', encoding=encoding, errors='replace', newline='') as f:
+            reader = csv.reader(f)
+            headers = next(reader, None)
+            
+            if headers:
+                # 查找DOI列
+                doi_index = None
+                for i, header in enumerate(headers):
+                    if header and 'doi' in header.lower():
+                        doi_index = i
+                        break
+                
+                if doi_index is None:
+                    # 如果没有找到DOI列名，尝试在所有列中查找DOI格式的数据
+                    for row in reader:
+                        for cell in row:
+                            doi = normalize_doi(cell)
+                            if doi:
+                                dois.append(doi)
+                else:
+                    for row in reader:
+                        if len(row) > doi_index:
+                            doi = normalize_doi(row[doi_index])
                             if doi:
                                 dois.append(doi)
-                    
-                    if dois:
-                        break
-                        
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                continue
         
         if not dois:
             print(f"警告：在文件 {file_path} 中未找到有效的DOI")
@@ -146,96 +320,234 @@ def read_dois_from_csv(file_path):
     return dois
 
 
+def get_host_semaphore(url):
+    """获取URL所属主机的并发信号量（多线程共享）"""
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            limit = HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY)
+            semaphore = threading.BoundedSemaphore(limit)
+            _host_semaphores[host] = semaphore
+    return semaphore
+
+
+def new_rate_bucket(rate):
+    """创建一个装满令牌的令牌桶（容量为每秒请求数，至少为1）"""
+    return {'rate': rate, 'tokens': max(rate, 1), 'updated': time.monotonic()}
+
+
+def wait_for_rate_limit(url):
+    """按主机的令牌桶限速：令牌不足时等待，直到可以发出下一个请求"""
+    host = urlparse(url).netloc
+    while True:
+        with _host_rate_limits_lock:
+            bucket = _host_rate_limits.get(host)
+            if bucket is None:
+                if host not in HOST_RATE_LIMITS:
+                    # 不知道该主机的频率限制，不做限速
+                    return
+                bucket = new_rate_bucket(HOST_RATE_LIMITS[host])
+                _host_rate_limits[host] = bucket
+            
+            now = time.monotonic()
+            # 容量至少为1，否则限额低于每秒1次时令牌永远攒不够一个请求
+            bucket['tokens'] = min(
+                max(bucket['rate'], 1),
+                bucket['tokens'] + (now - bucket['updated']) * bucket['rate']
+            )
+            bucket['updated'] = now
+            
+            if bucket['tokens'] >= 1:
+                bucket['tokens'] -= 1
+                return
+            wait_time = (1 - bucket['tokens']) / bucket['rate']
+        
+        if _stop_event.wait(wait_time):
+            check_stopped()
+
+
+def update_rate_limit(url, headers):
+    """根据响应头 X-Rate-Limit-Limit / X-Rate-Limit-Interval（如 50 / 1s）调整该主机的限速"""
+    limit = headers.get('X-Rate-Limit-Limit')
+    if not limit:
+        return
+    
+    match = _INTERVAL_RE.match(str(headers.get('X-Rate-Limit-Interval', '1s')).strip())
+    try:
+        interval = float(match.group(1)) * _INTERVAL_UNITS[match.group(2).lower()] if match else 1
+        rate = float(limit) / interval
+    except (ValueError, ZeroDivisionError):
+        return
+    if rate <= 0:
+        return
+    
+    host = urlparse(url).netloc
+    with _host_rate_limits_lock:
+        bucket = _host_rate_limits.get(host)
+        if bucket is None:
+            _host_rate_limits[host] = new_rate_bucket(rate)
+        else:
+            bucket['rate'] = rate
+
+
+def get_retry_wait(response, attempt):
+    """被限流(429)时的等待秒数：优先使用 Retry-After 响应头，否则逐次加长等待"""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+    return (attempt + 1) * 5
+
+
+def is_cached_request(url, params=None, headers=None):
+    """判断该GET请求是否已有未过期的本地缓存（未安装 requests-cache 时总是 False）"""
+    cache = getattr(SESSION, 'cache', None)
+    if cache is None:
+        return False
+    # 只有 CACHE_URLS 中的主机会被缓存，其余请求不必查询缓存库
+    host = urlparse(url).netloc
+    if not any(host == pattern.split('/')[0] for pattern in CACHE_URLS):
+        return False
+    try:
+        request = SESSION.prepare_request(requests.Request('GET', url, params=params, headers=headers))
+        cached = cache.get_response(cache.create_key(request))
+        return cached is not None and not cached.is_expired
+    except Exception:
+        return False
+
+
+def session_get(url, params=None, **kwargs):
+    """
+    发送GET请求：按主机限速并限制并发
+    命中本地缓存时不会访问服务器，因此不占用令牌和并发名额
+    """
+    if is_cached_request(url, params, kwargs.get('headers')):
+        return SESSION.get(url, params=params, **kwargs)
+    
+    wait_for_rate_limit(url)
+    with get_host_semaphore(url):
+        response = SESSION.get(url, params=params, **kwargs)
+    update_rate_limit(url, response.headers)
+    return response
+
+
 def make_request(url, params=None, retry=RETRY_COUNT):
-    """发送HTTP请求，带重试机制"""
+    """
+    发送HTTP请求，带重试机制
+    返回解析后的JSON；404 等客户端错误（429 除外）返回 None；
+    429、5xx 或网络错误在重试次数用完后抛出 RequestFailedError
+    """
     for attempt in range(retry):
+        check_stopped()
         try:
-            response = requests.get(
+            response = session_get(
                 url, 
                 params=params, 
-                headers=HEADERS, 
                 timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 404:
-                return None
+                return json_loads(response.content)
             elif response.status_code == 429:  # Rate limited
-                wait_time = (attempt + 1) * 5
-                print(f"  请求频率限制，等待 {wait_time} 秒...")
-                time.sleep(wait_time)
+                wait_time = get_retry_wait(response, attempt)
+                log(f"  请求频率限制，等待 {wait_time:g} 秒...")
+                _stop_event.wait(wait_time)
+            elif 400 <= response.status_code < 500:
+                # 404 以及 400、403、410 等重试也不会变的错误，都视为"查无此记录"
+                return None
             else:
-                time.sleep(1)
+                _stop_event.wait(1)
                 
         except requests.exceptions.Timeout:
-            print(f"  请求超时，重试 {attempt + 1}/{retry}")
-            time.sleep(2)
+            log(f"  请求超时，重试 {attempt + 1}/{retry}")
+            _stop_event.wait(2)
+        except RequestFailedError:
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"  请求错误: {e}")
-            time.sleep(1)
+            log(f"  请求错误: {e}")
+            _stop_event.wait(1)
         except Exception as e:
-            print(f"  未知错误: {e}")
-            time.sleep(1)
+            log(f"  未知错误: {e}")
+            _stop_event.wait(1)
     
-    return None
+    raise RequestFailedError(f"请求失败（已重试 {retry} 次）: {url}")
 
 
 def is_crossref_depositor_pubid(value):
     """判断输入是否为 Crossref Depositor PubID（如 J645505）"""
     if not value:
         return False
-    return re.fullmatch(r'[Jj]\d+', str(value).strip()) is not None
-def make_text_request(url, params=None, retry=RETRY_COUNT):
-    """发送HTTP请求获取文本，带重试机制"""
+    return _PUBID_RE.fullmatch(str(value).strip()) is not None
+def make_stream_request(url, params=None, retry=RETRY_COUNT):
+    """
+    发送流式HTTP请求获取文本，带重试机制
+    成功时返回尚未读取正文的响应（调用方负责关闭）；404 等客户端错误（429 除外）返回 None；
+    429、5xx 或网络错误在重试次数用完后抛出 RequestFailedError
+    """
     for attempt in range(retry):
+        check_stopped()
         try:
-            headers = dict(HEADERS)
-            headers["Accept"] = "text/plain"
-            response = requests.get(
+            response = session_get(
                 url,
                 params=params,
-                headers=headers,
-                timeout=REQUEST_TIMEOUT
+                headers={"Accept": "text/plain"},
+                timeout=REQUEST_TIMEOUT,
+                stream=True
             )
             if response.status_code == 200:
-                return response.text
-            elif response.status_code == 404:
+                return response
+            response.close()
+            if response.status_code == 429:  # Rate limited
+                wait_time = get_retry_wait(response, attempt)
+                log(f"  请求频率限制，等待 {wait_time:g} 秒...")
+                _stop_event.wait(wait_time)
+            elif 400 <= response.status_code < 500:
+                # 404 以及 400、403、410 等重试也不会变的错误，都视为"查无此记录"
                 return None
-            elif response.status_code == 429:  # Rate limited
-                wait_time = (attempt + 1) * 5
-                print(f"  请求频率限制，等待 {wait_time} 秒...")
-                time.sleep(wait_time)
             else:
-                time.sleep(1)
+                _stop_event.wait(1)
         except requests.exceptions.Timeout:
-            print(f"  请求超时，重试 {attempt + 1}/{retry}")
-            time.sleep(2)
+            log(f"  请求超时，重试 {attempt + 1}/{retry}")
+            _stop_event.wait(2)
+        except RequestFailedError:
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"  请求错误: {e}")
-            time.sleep(1)
+            log(f"  请求错误: {e}")
+            _stop_event.wait(1)
         except Exception as e:
-            print(f"  未知错误: {e}")
-            time.sleep(1)
-    return None
+            log(f"  未知错误: {e}")
+            _stop_event.wait(1)
+    raise RequestFailedError(f"请求失败（已重试 {retry} 次）: {url}")
 def read_dois_from_crossref_depositor_report(pubid):
     """从Crossref Depositor Report获取DOI列表（按原顺序，不去重）"""
-    text = make_text_request(CROSSREF_DEPOSITORREPORT_URL, params={"pubid": pubid})
-    if not text:
+    try:
+        response = make_stream_request(CROSSREF_DEPOSITORREPORT_URL, params={"pubid": pubid})
+    except RequestFailedError as e:
+        log(f"  {e}")
+        return []
+    if response is None:
         return []
     dois = []
-    for line in text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        # 跳过表头行（以 DOI 开头）
-        if line.upper().startswith("DOI"):
-            continue
-        # 第一列即 DOI
-        first_col = line.split(None, 1)[0]
-        doi = normalize_doi(first_col)
-        if doi:
-            dois.append(doi)
+    # 逐行读取响应，只解码单行，不在内存中保留整份报告
+    with response:
+        try:
+            for raw_line in response.iter_lines():
+                line = raw_line.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                # 跳过表头行（以 DOI 开头）
+                if line.upper().startswith("DOI"):
+                    continue
+                # 第一列即 DOI
+                first_col = line.split(None, 1)[0]
+                doi = normalize_doi(first_col)
+                if doi:
+                    dois.append(doi)
+        except requests.exceptions.RequestException as e:
+            log(f"  读取Depositor Report时出错: {e}")
     return dois
 
 def get_citations_from_openalex(doi):
@@ -245,7 +557,10 @@ def get_citations_from_openalex(doi):
     try:
         # 首先获取该DOI对应的OpenAlex ID
         work_url = f"{OPENALEX_BASE_URL}/works/doi:{doi}"
-        work_data = make_request(work_url)
+        work_data = make_request(work_url, {
+            "select": "id,cited_by_count",
+            "mailto": CONTACT_EMAIL
+        })
         
         if not work_data:
             return citations
@@ -256,24 +571,49 @@ def get_citations_from_openalex(doi):
         if cited_by_count == 0:
             return citations
         
-        # 获取引用列表
-        cursor = "*"
-        page_count = 0
-        max_pages = 50  # 限制最大页数
+        # 获取引用列表（按页码分页，并发请求各页）
+        per_page = 200
+        max_pages = 50  # 限制最大页数（OpenAlex按页码分页最多支持前10000条）
         
-        while cursor and page_count < max_pages:
-            citations_url = f"{OPENALEX_BASE_URL}/works"
-            params = {
+        def fetch_page(page):
+            check_stopped()
+            return make_request(f"{OPENALEX_BASE_URL}/works", {
                 "filter": f"cites:{openalex_id}",
-                "per-page": 200,
-                "cursor": cursor,
-                "select": "doi,title,authorships,publication_year"
+                "per-page": per_page,
+                "page": page,
+                "select": "doi,title,authorships,publication_year",
+                "mailto": CONTACT_EMAIL
+            })
+        
+        def page_total(count):
+            return min(max_pages, (count + per_page - 1) // per_page)
+        
+        with ThreadPoolExecutor(max_workers=OPENALEX_PAGE_WORKERS) as executor:
+            # 先按 cited_by_count 预估页数，第一页与其余页同时请求
+            expected_pages = page_total(cited_by_count)
+            futures = {
+                page: executor.submit(fetch_page, page)
+                for page in range(1, expected_pages + 1)
             }
             
-            data = make_request(citations_url, params)
+            first_page = futures[1].result()
+            if not first_page or 'results' not in first_page:
+                for future in futures.values():
+                    future.cancel()
+                return citations
             
+            # 以第一页返回的 meta.count 为准：补齐预估不足的页，去掉多余的页
+            total_pages = page_total(first_page.get('meta', {}).get('count', 0))
+            for page in range(expected_pages + 1, total_pages + 1):
+                futures[page] = executor.submit(fetch_page, page)
+            for page in range(max(total_pages, 1) + 1, expected_pages + 1):
+                futures.pop(page).cancel()
+            
+            pages = [futures[page].result() for page in sorted(futures)]
+        
+        for data in pages:
             if not data or 'results' not in data:
-                break
+                continue
             
             for work in data.get('results', []):
                 raw_doi = work.get('doi', '')
@@ -290,16 +630,12 @@ def get_citations_from_openalex(doi):
                             'year': str(work.get('publication_year')) if work.get('publication_year') else '',
                             'source': 'OpenAlex'
                         })
-            
-            # 获取下一页游标
-            meta = data.get('meta', {})
-            cursor = meta.get('next_cursor')
-            page_count += 1
-            
-            time.sleep(DELAY_BETWEEN_REQUESTS)
         
+    except RequestFailedError:
+        # 网络错误或持续限流：交给调用方按失败处理，不能当作"没有引用"
+        raise
     except Exception as e:
-        print(f"  OpenAlex查询出错: {e}")
+        log(f"  OpenAlex查询出错: {e}")
     
     return citations
 
@@ -342,71 +678,194 @@ def get_citations_from_opencitations(doi):
                         'year': '',
                         'source': 'OpenCitations'
                     })        
+    except RequestFailedError:
+        # 网络错误或持续限流：交给调用方按失败处理，不能当作"没有引用"
+        raise
     except Exception as e:
-        print(f"  OpenCitations查询出错: {e}")
+        log(f"  OpenCitations查询出错: {e}")
     
     return citations
 
 
-def get_metadata_from_crossref(doi):
-    """从Crossref获取论文的标题、作者和发表年份"""
-    try:
-        url = f"{CROSSREF_BASE_URL}/{doi}"
-        data = make_request(url)
-        
-        if not data or 'message' not in data:
-            return None, [], ''
-        
-        message = data['message']
-        
-        # 获取标题
-        title = ''
-        titles = message.get('title', [])
-        if titles:
-            title = titles[0] if isinstance(titles, list) else titles
-        
-        # 获取作者
-        authors = []
-        author_list = message.get('author', [])
-        for author in author_list:
-            given = author.get('given', '')
-            family = author.get('family', '')
-            
-            if given and family:
-                full_name = f"{given} {family}"
-            elif family:
-                full_name = family
-            elif given:
-                full_name = given
-            else:
-                full_name = author.get('name', '')
-            
-            if full_name:
-                authors.append(full_name.strip())
+def parse_crossref_metadata(message):
+    """从Crossref的单条记录中解析标题、作者和发表年份"""
+    # 获取标题
+    title = ''
+    titles = message.get('title', [])
+    if titles:
+        title = titles[0] if isinstance(titles, list) else titles
+    
+    # 获取作者
+    authors = []
+    author_list = message.get('author', [])
+    for author in author_list:
+        given = author.get('given', '')
+        family = author.get('family', '')
         
-        # 获取发表年份（优先 issued，其次 published-print / published-online / created）
-        year = ''
-        for field in ['issued', 'published-print', 'published-online', 'created']:
-            date_info = message.get(field, {})
-            if isinstance(date_info, dict):
-                date_parts = date_info.get('date-parts', [])
-                if date_parts and isinstance(date_parts, list) and date_parts[0]:
-                    year_value = date_parts[0][0] if len(date_parts[0]) > 0 else None
-                    if year_value:
-                        year = str(year_value)
-                        break
+        if given and family:
+            full_name = f"{given} {family}"
+        elif family:
+            full_name = family
+        elif given:
+            full_name = given
+        else:
+            full_name = author.get('name', '')
         
-        return title, authors, year
+        if full_name:
+            authors.append(full_name.strip())
+    
+    # 获取发表年份（优先 issued，其次 published-print / published-online / created）
+    year = ''
+    for field in ['issued', 'published-print', 'published-online', 'created']:
+        date_info = message.get(field, {})
+        if isinstance(date_info, dict):
+            date_parts = date_info.get('date-parts', [])
+            if date_parts and isinstance(date_parts, list) and date_parts[0]:
+                year_value = date_parts[0][0] if len(date_parts[0]) > 0 else None
+                if year_value:
+                    year = str(year_value)
+                    break
+    
+    return title, authors, year
+
+
+def get_metadata_from_crossref(doi):
+    """
+    从Crossref获取单篇论文的 (标题, 作者, 发表年份)
+    Crossref中不存在该DOI时返回 None；请求失败时抛出 RequestFailedError
+    """
+    data = make_request(f"{CROSSREF_BASE_URL}/{doi}")
+    if not data or 'message' not in data:
+        return None
+    return parse_crossref_metadata(data['message'])
+
+
+def get_metadata_batch_from_crossref(dois):
+    """
+    从Crossref批量获取论文的标题、作者和发表年份
+    使用 filter=doi:a,doi:b,... 一次请求查询多个DOI，
+    返回 {doi: (title, authors, year)}，Crossref中不存在的DOI对应 None，
+    请求失败的DOI不会出现在结果里
+    """
+    metadata = {}
+    
+    # DOI中含逗号会破坏 filter 参数，这类DOI单独查询
+    single_dois = [doi for doi in dois if ',' in doi]
+    batch_dois = [doi for doi in dois if ',' not in doi]
+    
+    if batch_dois:
+        params = {
+            "filter": ",".join(f"doi:{doi}" for doi in batch_dois),
+            "rows": len(batch_dois),
+            "select": "DOI,title,author,issued,published-print,published-online,created"
+        }
+        try:
+            data = make_request(CROSSREF_BASE_URL, params)
+        except RequestFailedError:
+            # 429、服务器错误或网络问题：逐个重查只会向已经在限流的主机多发几十倍请求，
+            # 直接跳过这一批，这些DOI不写入缓存，下次运行时会重新查询
+            data = None
+            batch_dois = []
         
-    except Exception as e:
-        # Crossref 经常报 404，不打印详细错误以免刷屏，除非调试
-        # print(f"  Crossref查询出错 ({doi}): {e}")
-        return None, [], ''
+        if data and 'message' in data:
+            found = {}
+            for item in data['message'].get('items', []):
+                doi = normalize_doi(item.get('DOI', ''))
+                if doi:
+                    found[doi] = parse_crossref_metadata(item)
+            for doi in batch_dois:
+                metadata[doi] = found.get(doi)
+        else:
+            # 整批请求被拒绝（如某个DOI格式异常导致 400），退回逐个查询，避免整批丢失
+            single_dois.extend(batch_dois)
+    
+    for doi in single_dois:
+        if _stop_event.is_set():
+            break
+        try:
+            metadata[doi] = get_metadata_from_crossref(doi)
+        except Exception:
+            # Crossref 经常查不到部分DOI，不打印详细错误以免刷屏，除非调试
+            continue
+    
+    return metadata
+
+
+def _get_crossref_cache():
+    """打开（必要时创建）Crossref元数据缓存库，调用方需持有 _crossref_cache_lock"""
+    global _crossref_cache
+    if _crossref_cache is None:
+        try:
+            conn = sqlite3.connect(CROSSREF_CACHE_FILE, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS crossref_metadata ("
+                "doi TEXT PRIMARY KEY, metadata TEXT, fetched_at REAL NOT NULL)"
+            )
+            conn.commit()
+            _crossref_cache = conn
+        except sqlite3.Error as e:
+            log(f"  无法打开Crossref缓存，将不使用缓存: {e}")
+            _crossref_cache = False
+    return _crossref_cache
+
+
+def load_cached_crossref_metadata(dois):
+    """
+    从本地缓存读取未过期的Crossref元数据
+    返回 {doi: (title, authors, year)}，缓存中记录为"Crossref查无此DOI"的对应 None
+    """
+    cached = {}
+    min_fetched_at = time.time() - CACHE_EXPIRE_AFTER.total_seconds()
+    
+    with _crossref_cache_lock:
+        conn = _get_crossref_cache()
+        if not conn:
+            return cached
+        try:
+            # 分段查询，避免超过 SQLite 的参数个数限制
+            for i in range(0, len(dois), 500):
+                chunk = dois[i:i + 500]
+                rows = conn.execute(
+                    "SELECT doi, metadata FROM crossref_metadata "
+                    f"WHERE fetched_at >= ? AND doi IN ({','.join('?' * len(chunk))})",
+                    [min_fetched_at, *chunk]
+                )
+                for doi, metadata in rows:
+                    cached[doi] = tuple(json_loads(metadata)) if metadata else None
+        except (sqlite3.Error, ValueError) as e:
+            log(f"  读取Crossref缓存时出错: {e}")
+    
+    return cached
+
+
+def store_crossref_metadata(metadata):
+    """把查询到的Crossref元数据（None 表示查无此DOI）写入本地缓存"""
+    if not metadata:
+        return
+    
+    fetched_at = time.time()
+    rows = [
+        (doi, json_dumps(list(value)).decode('utf-8') if value else None, fetched_at)
+        for doi, value in metadata.items()
+    ]
+    
+    with _crossref_cache_lock:
+        conn = _get_crossref_cache()
+        if not conn:
+            return
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO crossref_metadata (doi, metadata, fetched_at) VALUES (?, ?, ?)",
+                rows
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            log(f"  写入Crossref缓存时出错: {e}")
 
 
 def merge_citations(openalex_citations, opencitations_citations):
     """合并并去重来自不同来源的引用"""
-    merged = OrderedDict()
+    merged = {}
     
     # 辅助函数：将引用添加到合并字典
     def add_to_merged(citations_list):
@@ -434,64 +893,107 @@ def merge_citations(openalex_citations, opencitations_citations):
     return list(merged.values())
 
 
-def enrich_citation_metadata(citations, progress_callback=None):
-    """使用Crossref补全引用的元数据"""
-    total = len(citations)
+# 需要补全的元数据字段，顺序与 parse_crossref_metadata 的返回值一致
+METADATA_FIELDS = ('title', 'authors', 'year')
+
+
+def missing_metadata_fields(citation):
+    """返回引用记录中缺失的元数据字段集合（标题、作者、发表年份）"""
+    return {field for field in METADATA_FIELDS if not citation.get(field)}
+
+
+def enrich_citation_metadata(citations, tag=None):
+    """使用Crossref补全引用的元数据（分批并发查询），tag 不为空时输出以其开头的提示和进度"""
+    # 只有缺少标题、作者或发表年份的引用才需要从Crossref获取
+    pending = []
+    for citation in citations:
+        missing = missing_metadata_fields(citation)
+        if missing:
+            pending.append((citation, missing))
     
-    for i, citation in enumerate(citations):
-        if progress_callback:
-            progress_callback(i + 1, total)
-        
-        # 如果缺少标题、作者或发表年份，从Crossref获取
-        if not citation.get('title') or not citation.get('authors') or not citation.get('year'):
-            title, authors, year = get_metadata_from_crossref(citation['doi'])
-            
-            if title and not citation.get('title'):
-                citation['title'] = title
-            
-            if authors and not citation.get('authors'):
-                citation['authors'] = authors
-            if year and not citation.get('year'):
-                citation['year'] = year
+    if tag and len(pending) < len(citations):
+        log(f"  {tag}   其中 {len(citations) - len(pending)} 条元数据已完整，跳过Crossref查询")
+    
+    def apply_metadata(batch, metadata):
+        for citation, missing in batch:
+            if not metadata.get(citation['doi']):
+                continue
+            values = dict(zip(METADATA_FIELDS, metadata[citation['doi']]))
             
-            time.sleep(DELAY_BETWEEN_REQUESTS)
+            # 只填充缺失的字段，已有的信息不覆盖
+            for field in missing:
+                if values[field]:
+                    citation[field] = values[field]
+    
+    # 先用本地缓存补全，只有缓存中没有的DOI才向Crossref查询
+    cached = load_cached_crossref_metadata([c['doi'] for c, _ in pending])
+    apply_metadata(pending, cached)
+    pending = [(c, missing) for c, missing in pending if c['doi'] not in cached]
+    total = len(pending)
+    
+    if tag and cached:
+        log(f"  {tag}   其中 {len(cached)} 条从本地缓存补全")
+    if tag and pending:
+        log(f"  {tag} → 从Crossref补全元数据 (可能较慢)...")
+    
+    def enrich_batch(batch):
+        check_stopped()
+        metadata = get_metadata_batch_from_crossref([c['doi'] for c, _ in batch])
+        store_crossref_metadata(metadata)
+        apply_metadata(batch, metadata)
+        return len(batch)
+    
+    batches = [
+        pending[i:i + CROSSREF_BATCH_SIZE]
+        for i in range(0, total, CROSSREF_BATCH_SIZE)
+    ]
+    
+    done = 0
+    with ThreadPoolExecutor(max_workers=CROSSREF_WORKERS) as executor:
+        futures = [executor.submit(enrich_batch, batch) for batch in batches]
+        for future in as_completed(futures):
+            done += future.result()
+            if tag:
+                print_progress(f"  {tag}   进度", done, total)
+    
+    # 作者列表在此拼接为字符串，写入CSV时直接使用
+    for citation in citations:
+        citation['authors_str'] = '; '.join(citation.get('authors', []))
     
     return citations
 
 
 def process_single_doi(doi, index, total):
-    """处理单个DOI的引用查询"""
-    print(f"\n[{index}/{total}] 正在处理: {doi}")
-    
-    # 从OpenAlex获取引用
-    print("  → 查询OpenAlex...")
-    openalex_citations = get_citations_from_openalex(doi)
-    print(f"    找到 {len(openalex_citations)} 条引用")
-    time.sleep(DELAY_BETWEEN_REQUESTS)
+    """处理单个DOI的引用查询（可在多个线程中并发调用）"""
+    # 多个DOI并发处理时输出会交错，每行带上序号以便区分
+    tag = f"[{index}/{total}]"
+    log(f"\n{tag} 正在处理: {doi}")
     
-    # 从OpenCitations获取引用
-    print("  → 查询OpenCitations...")
-    opencitations_citations = get_citations_from_opencitations(doi)
-    print(f"    找到 {len(opencitations_citations)} 条引用")
-    time.sleep(DELAY_BETWEEN_REQUESTS)
+    # 同时从OpenAlex和OpenCitations获取引用（两个主机的频率限制互不影响）
+    log(f"  {tag} → 查询OpenAlex和OpenCitations...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        openalex_future = executor.submit(get_citations_from_openalex, doi)
+        opencitations_future = executor.submit(get_citations_from_opencitations, doi)
+        openalex_citations = openalex_future.result()
+        opencitations_citations = opencitations_future.result()
+    log(f"  {tag}   OpenAlex找到 {len(openalex_citations)} 条引用")
+    log(f"  {tag}   OpenCitations找到 {len(opencitations_citations)} 条引用")
     
     # 合并去重
     merged_citations = merge_citations(openalex_citations, opencitations_citations)
-    print(f"  → 合并去重后: {len(merged_citations)} 条引用")
+    log(f"  {tag} → 合并去重后: {len(merged_citations)} 条引用")
     
     # 使用Crossref补全信息
     if merged_citations:
-        print("  → 从Crossref补全元数据 (可能较慢)...")
-        
-        def progress(current, total):
-            if current % 5 == 0 or current == total:
-                print(f"    进度: {current}/{total}")
-        
-        merged_citations = enrich_citation_metadata(merged_citations, progress)
+        merged_citations = enrich_citation_metadata(merged_citations, tag)
     
     return merged_citations
 
 
+# 没有引用记录时写入的占位行
+_NO_CITATION = {'doi': '(无引用记录)', 'title': '', 'authors_str': '', 'year': ''}
+
+
 def save_results_to_csv(results, output_path):
     """将结果保存到CSV文件"""
     try:
@@ -500,7 +1002,7 @@ def save_results_to_csv(results, output_path):
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        with open(output_path, 'w', newline='', encoding='utf-8-sig', buffering=1 << 20) as f:
             writer = csv.writer(f)
             
             # 写入标题行
@@ -512,31 +1014,19 @@ def save_results_to_csv(results, output_path):
                 '引用论文发表年份'
             ])
             
-            # 写入数据
-            for queried_doi, citations in results.items():
-                if not citations:
-                    # 如果没有引用，也写入一行表示
-                    writer.writerow([queried_doi, '(无引用记录)', '', '', ''])
-                else:
-                    # 再次确保写入前没有重复 (虽然merge_citations已经处理过)
-                    seen_citing_dois = set()
-                    
-                    for citation in citations:
-                        citing_doi = citation.get('doi', '')
-                        
-                        # 如果这个引用DOI已经在这个源DOI下写过了，跳过
-                        if citing_doi in seen_citing_dois:
-                            continue
-                        seen_citing_dois.add(citing_doi)
-                        
-                        authors_str = '; '.join(citation.get('authors', []))
-                        writer.writerow([
-                            queried_doi,
-                            citing_doi,
-                            citation.get('title', ''),
-                            authors_str,
-                            citation.get('year', '')
-                        ])
+            # 写入数据（merge_citations 已按DOI去重；如果没有引用，也写入一行表示）
+            rows = (
+                (
+                    queried_doi,
+                    citation.get('doi', ''),
+                    citation.get('title', ''),
+                    citation.get('authors_str', ''),
+                    citation.get('year', '')
+                )
+                for queried_doi, citations in results.items()
+                for citation in (citations or [_NO_CITATION])
+            )
+            writer.writerows(rows)
         
         print(f"\n结果已保存至: {output_path}")
         return True
@@ -546,6 +1036,55 @@ def save_results_to_csv(results, output_path):
         return False
 
 
+def get_progress_path(pubid=None, input_file=None):
+    """
+    根据输入（标准化后的PubID 或 CSV文件）生成断点续查文件的路径，保存在当前目录
+    CSV文件名后附加其绝对路径的短哈希，不同目录下的同名文件不会共用同一个进度文件
+    """
+    if pubid:
+        name = pubid
+    else:
+        name = os.path.splitext(os.path.basename(input_file))[0]
+        digest = hashlib.sha1(os.path.abspath(input_file).encode('utf-8')).hexdigest()[:8]
+        name = f"{name}_{digest}"
+    name = re.sub(r'[^\w.-]+', '_', name) or 'input'
+    return os.path.join(os.getcwd(), f"Citation_Progress_{name}.jsonl")
+
+
+def load_progress(progress_path):
+    """
+    读取断点续查文件，返回 {被查询DOI: 引用列表}
+    中断时可能在末尾留下写了一半的行，读取后将其截掉，保证后续追加的记录从新的一行开始
+    """
+    results = {}
+    if not os.path.exists(progress_path):
+        return results
+    
+    try:
+        with open(progress_path, 'r+b') as f:
+            complete_size = 0  # 最后一个换行符之后的位置
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete_size += len(line)
+                try:
+                    record = json_loads(line)
+                    results[record['queried']] = record['citations']
+                except (ValueError, KeyError, TypeError):
+                    continue
+            f.truncate(complete_size)
+    except OSError as e:
+        print(f"读取进度文件时出错: {e}")
+    
+    return results
+
+
+def append_progress(f, doi, citations):
+    """把单个DOI的查询结果追加写入断点续查文件"""
+    f.write(json_dumps({'queried': doi, 'citations': citations}) + b"\n")
+    f.flush()
+
+
 def generate_summary_report(results):
     """生成摘要报告"""
     print("\n" + "=" * 70)
@@ -603,6 +1142,7 @@ def main():
         
         unique_dois = dois  # 不合并去重
         print(f"找到 {len(unique_dois)} 个DOI")
+        progress_path = get_progress_path(pubid=pubid)
     else:
         input_file = input_value
         if not os.path.exists(input_file):
@@ -619,12 +1159,24 @@ def main():
             input("按回车键退出...")
             return
         
-        # 去重 (使用OrderedDict保持顺序)
-        unique_dois = list(OrderedDict.fromkeys(dois))
+        # 去重 (dict 保持插入顺序)
+        unique_dois = list(dict.fromkeys(dois))
         print(f"找到 {len(dois)} 个DOI，去重后: {len(unique_dois)} 个")
+        progress_path = get_progress_path(input_file=input_file)
+    
+    # 读取上次中断时保存的进度，已完成的DOI不再重复查询
+    queried = set(unique_dois)
+    completed = {
+        doi: citations for doi, citations in load_progress(progress_path).items()
+        if doi in queried
+    }
+    pending_dois = [doi for doi in unique_dois if doi not in completed]
+    if completed:
+        print(f"\n发现上次未完成的进度: {progress_path}")
+        print(f"已完成 {len(completed)} 篇，剩余 {len(pending_dois)} 篇")
     
     # 确认继续
-    print(f"\n将要查询 {len(unique_dois)} 篇论文的引用情况")
+    print(f"\n将要查询 {len(pending_dois)} 篇论文的引用情况")
     print("这可能需要一些时间，具体取决于引用数量...")
     
     confirm = input("\n是否继续？(y/n): ").strip().lower()
@@ -632,20 +1184,45 @@ def main():
         print("已取消操作")
         return
     
-    # 处理每个DOI
-    results = OrderedDict()
+    # 并发处理每个DOI（各主机的并发数和请求频率分别由 HOST_CONCURRENCY、HOST_RATE_LIMITS 限制）
+    # 每完成一个DOI就追加写入进度文件，中断后重新运行相同输入即可继续
     start_time = time.time()
+    interrupted = False
+    failed_dois = []
     
-    for i, doi in enumerate(unique_dois, 1):
-        try:
-            citations = process_single_doi(doi, i, len(unique_dois))
-            results[doi] = citations
-        except KeyboardInterrupt:
-            print("\n\n用户中断操作")
-            break
-        except Exception as e:
-            print(f"  处理出错: {e}")
-            results[doi] = []
+    executor = ThreadPoolExecutor(max_workers=DOI_WORKERS)
+    futures = {
+        executor.submit(process_single_doi, doi, i, len(pending_dois)): doi
+        for i, doi in enumerate(pending_dois, 1)
+    }
+    try:
+        with open(progress_path, 'ab') as progress_file:
+            for future in as_completed(futures):
+                doi = futures[future]
+                try:
+                    completed[doi] = future.result()
+                    append_progress(progress_file, doi, completed[doi])
+                except Exception as e:
+                    # 出错的DOI不写入进度文件，下次运行时会重新查询
+                    log(f"  处理出错 ({doi}): {e}")
+                    completed[doi] = []
+                    failed_dois.append(doi)
+    except KeyboardInterrupt:
+        interrupted = True
+        # 通知进行中的任务停止发出新请求，再等它们退出
+        _stop_event.set()
+        log("\n\n用户中断操作，正在等待进行中的请求结束...")
+        log(f"已完成的结果保存在: {progress_path}")
+        log("重新运行并输入相同的文件或编号即可继续查询")
+    finally:
+        # 取消尚未开始的任务（逐个取消，不依赖 Python 3.9 才有的 cancel_futures）；
+        # 中断时进行中的任务会在当前请求结束后退出
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+    
+    # 按输入顺序整理结果
+    results = {doi: completed[doi] for doi in unique_dois if doi in completed}
     
     # 计算耗时
     elapsed_time = time.time() - start_time
@@ -664,7 +1241,16 @@ def main():
         output_path = os.path.join(os.getcwd(), output_filename)
         print(f"D盘不存在，将保存到当前目录")
     
-    save_results_to_csv(results, output_path)
+    if failed_dois:
+        print(f"\n有 {len(failed_dois)} 篇论文查询失败，结果中记为无引用记录")
+        print("重新运行并输入相同的文件或编号，将只重新查询这些论文")
+    
+    # 全部查询成功且结果已保存后，删除进度文件
+    if save_results_to_csv(results, output_path) and not interrupted and not failed_dois:
+        try:
+            os.remove(progress_path)
+        except OSError:
+            pass
     
     print("\n" + "=" * 70)
     print("                         处理完成！")